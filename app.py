@@ -1,6 +1,16 @@
 import streamlit as st
-import json
-from datetime import datetime, timedelta
+import os
+from datetime import date, timedelta
+from types import MappingProxyType
+
+import risk_engine
+
+# orjson is optional; fall back to the standard library parser
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
 
 # --- 1. CONFIGURATION & CSS STYLING ---
 st.set_page_config(page_title="Smoot", page_icon="✈️", layout="wide")
@@ -40,95 +50,108 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 2. DATA LOADING ---
-@st.cache_data
-def load_data():
+DB_PATH = 'airlines_db.json'
+
+# Persisted to disk so restarts skip the JSON parse. The file's mtime and the
+# preprocessing version are part of the cache key, so editing the database or
+# risk_engine's preprocessing still invalidates it. Every cached function
+# derived from db also takes db_mtime for the same reason.
+# Old entries are not pruned from disk; st.cache_data.clear() or deleting
+# ~/.streamlit/cache removes them.
+@st.cache_data(persist="disk")
+def load_data(db_mtime, preprocess_version):
     try:
-        with open('airlines_db.json', 'r') as f:
-            return json.load(f)
+        if orjson is not None:
+            with open(DB_PATH, 'rb') as f:
+                db = orjson.loads(f.read())
+        else:
+            with open(DB_PATH, 'r') as f:
+                db = json.load(f)
     except FileNotFoundError:
         st.error("⚠️ Database file not found.")
-        return {}
+        return {}, {}, {}, None
+
+    risk_engine.prepare_db(db)
+
+    # Map "Air Canada" -> "AC"
+    name_to_code = {data['name']: code for code, data in db.items()}
+    # Map "AC" -> "Air Canada" (for displaying alternatives)
+    code_to_name = {code: data['name'] for code, data in db.items()}
+
+    # Flat per-union arrays, only worth building for the vectorized risk pass
+    union_arrays = None
+    if len(db) >= risk_engine.VECTORIZE_MIN_AIRLINES:
+        union_arrays = risk_engine.build_union_arrays(db)
 
-db = load_data()
-# Map "Air Canada" -> "AC"
-name_to_code = {data['name']: code for code, data in db.items()}
-# Map "AC" -> "Air Canada" (for displaying alternatives)
-code_to_name = {code: data['name'] for code, data in db.items()}
+    return db, name_to_code, code_to_name, union_arrays
+
+try:
+    db_mtime = os.path.getmtime(DB_PATH)
+except OSError:
+    db_mtime = None
+
+db, name_to_code, code_to_name, union_arrays = load_data(db_mtime, risk_engine.PREPROCESS_VERSION)
 
 # EXPANDED City/Hub Database
-city_db = {
-    "Toronto (YYZ)": ["AC", "WS", "TS", "UA", "DL", "AA"],
-    "Vancouver (YVR)": ["AC", "WS", "UA", "DL", "AA", "AS"],
-    "Montreal (YUL)": ["AC", "TS", "UA", "DL", "AA"],
-    "New York (JFK)": ["DL", "B6", "AA", "AS"],
-    "New York (LGA)": ["DL", "AA", "UA", "WN", "AC", "WS"],
-    "Newark (EWR)": ["UA", "DL", "AA", "AC", "AS", "NK"],
-    "Los Angeles (LAX)": ["UA", "AA", "DL", "AS", "WN", "B6", "NK", "AC", "WS"],
-    "Chicago (ORD)": ["UA", "AA", "DL", "WN", "AC", "WS"],
-    "Atlanta (ATL)": ["DL", "WN", "NK", "UA", "AA"],
-    "Dallas (DFW)": ["AA", "UA", "DL", "NK", "AC"],
-    "Denver (DEN)": ["UA", "WN", "DL", "AA", "AC"],
-    "Seattle (SEA)": ["AS", "DL", "UA", "WN", "AC"],
-    "San Francisco (SFO)": ["UA", "AS", "DL", "AA", "AC", "WS", "B6"],
-    "Miami (MIA)": ["AA", "DL", "UA", "AC", "WS", "NK"],
-    "Orlando (MCO)": ["WN", "NK", "DL", "UA", "AA", "AC", "WS", "B6"],
-    "Las Vegas (LAS)": ["WN", "NK", "UA", "DL", "AA", "AC", "WS", "AS", "B6"],
-    "Boston (BOS)": ["B6", "DL", "UA", "AA", "AC", "WS", "NK"],
-    "Fort Lauderdale (FLL)": ["NK", "B6", "WN", "DL", "UA", "AA", "AC", "WS"]
-}
+# Built once per process and shared read-only across sessions
+@st.cache_resource
+def _city_db():
+    return MappingProxyType({city: tuple(codes) for city, codes in {
+        "Toronto (YYZ)": ["AC", "WS", "TS", "UA", "DL", "AA"],
+        "Vancouver (YVR)": ["AC", "WS", "UA", "DL", "AA", "AS"],
+        "Montreal (YUL)": ["AC", "TS", "UA", "DL", "AA"],
+        "New York (JFK)": ["DL", "B6", "AA", "AS"],
+        "New York (LGA)": ["DL", "AA", "UA", "WN", "AC", "WS"],
+        "Newark (EWR)": ["UA", "DL", "AA", "AC", "AS", "NK"],
+        "Los Angeles (LAX)": ["UA", "AA", "DL", "AS", "WN", "B6", "NK", "AC", "WS"],
+        "Chicago (ORD)": ["UA", "AA", "DL", "WN", "AC", "WS"],
+        "Atlanta (ATL)": ["DL", "WN", "NK", "UA", "AA"],
+        "Dallas (DFW)": ["AA", "UA", "DL", "NK", "AC"],
+        "Denver (DEN)": ["UA", "WN", "DL", "AA", "AC"],
+        "Seattle (SEA)": ["AS", "DL", "UA", "WN", "AC"],
+        "San Francisco (SFO)": ["UA", "AS", "DL", "AA", "AC", "WS", "B6"],
+        "Miami (MIA)": ["AA", "DL", "UA", "AC", "WS", "NK"],
+        "Orlando (MCO)": ["WN", "NK", "DL", "UA", "AA", "AC", "WS", "B6"],
+        "Las Vegas (LAS)": ["WN", "NK", "UA", "DL", "AA", "AC", "WS", "AS", "B6"],
+        "Boston (BOS)": ["B6", "DL", "UA", "AA", "AC", "WS", "NK"],
+        "Fort Lauderdale (FLL)": ["NK", "B6", "WN", "DL", "UA", "AA", "AC", "WS"]
+    }.items()})
+
+city_db = _city_db()
 
 # Sort the cities alphabetically for the dropdown
-sorted_cities = sorted(city_db.keys())
+@st.cache_resource
+def get_city_options():
+    return tuple(sorted(city_db))
+
+# Airline names offered for a city, in hub order
+@st.cache_resource(max_entries=128)
+def get_airline_names(city, db_mtime):
+    return tuple(code_to_name[c] for c in city_db[city] if c in code_to_name)
+
+sorted_cities = get_city_options()
 
 # --- 3. RISK ENGINE ---
-def get_airline_risk(code, start_date, end_date, db):
+# Risk for every airline in one pass, cached per date range so the chosen
+# airline and its alternatives are all just dict lookups.
+@st.cache_data(ttl="1h", max_entries=256)
+def compute_all_risks(start_date, end_date, db_mtime):
     """
-    Returns: (Color, List of Messages)
+    Returns: {code: (Color, List of Messages)}
     """
-    if code not in db:
-        return "GREY", ["No data available"]
+    return risk_engine.compute_all_risks(start_date, end_date, db, union_arrays)
 
-    airline_data = db.get(code)
-    risk_color = "GREEN"
-    reasons = []
+# Verdict plus the messages already joined into the markdown we display
+@st.cache_data(ttl="1h", max_entries=1024)
+def render_risk(code, start_date, end_date, db_mtime):
+    """
+    Returns: (Color, Markdown)
+    """
+    risk_color, messages = compute_all_risks(start_date, end_date, db_mtime)[code]
+    return risk_color, "\n\n".join(messages)
 
-    for group, details in airline_data['unions'].items():
-        status = details['status']
-        if details['expiration_date'] == "N/A":
-             expiry_date = datetime(2099, 12, 31).date()
-        else:
-             expiry_date = datetime.strptime(details['expiration_date'], "%Y-%m-%d").date()
-
-        # Safe
-        if status in ["Non-Union", "Binding Arbitration"]:
-            continue 
-
-        # Critical
-        if any(x in status for x in ["Strike", "Impasse", "Cooling-off"]):
-            risk_color = "RED"
-            reasons.append(f"🔴 [CRITICAL] {group.title()}: {status}")
-
-        # Warnings
-        elif risk_color != "RED":
-            # Expiry Logic
-            if expiry_date < start_date:
-                risk_color = "YELLOW"
-                reasons.append(f"⚠️ [WARNING] {group.title()} contract expires BEFORE your trip ({details['expiration_date']}).")
-            elif start_date <= expiry_date <= end_date:
-                risk_color = "YELLOW"
-                reasons.append(f"⚠️ [WARNING] {group.title()} contract expires DURING your trip.")
-            elif 0 < (expiry_date - end_date).days < 30:
-                risk_color = "YELLOW"
-                reasons.append(f"⚠️ [CAUTION] {group.title()} contract expires shortly after return.")
-            
-            if status == "Negotiating" and risk_color == "GREEN":
-                risk_color = "YELLOW"
-                reasons.append(f"⚠️ [WARNING] {group.title()} are currently negotiating.")
-
-    if risk_color == "GREEN":
-        reasons.append("✅ Contracts active.")
-
-    return risk_color, reasons
+# Most safe alternatives we list for a risky airline
+MAX_ALTERNATIVES = 5
 
 # --- 4. LAYOUT & SEARCH BAR ---
 
@@ -146,125 +169,118 @@ with col_title:
 
 st.write("") # Spacer
 
-# THE SEARCH BUCKETS (3 Columns)
-with st.container():
-    c1, c2, c3 = st.columns(3)
-    
-    # Bucket 1: Dates
-    with c1:
-        st.markdown("**When are you traveling?**")
-        today = datetime.today()
-        date_range = st.date_input(
-            "Trip Dates",
-            value=(today, today + timedelta(days=7)),
-            min_value=today,
-            label_visibility="collapsed" 
-        )
-
-    # Bucket 2: City
-    with c2:
-        st.markdown("**To which city?**")
-        selected_city = st.selectbox(
-            "Destination",
-            options=sorted_cities,
-            index=0, 
-            label_visibility="collapsed"
-        )
-
-    # Bucket 3: Airline (Dynamic)
-    with c3:
-        st.markdown("**With which airline?**")
-        # Get airlines available for the selected city
-        available_codes = city_db[selected_city]
-        
-        # Convert codes (AC) back to names (Air Canada) for the dropdown
-        available_names = [code_to_name.get(c, c) for c in available_codes if c in code_to_name]
-        
-        selected_airline_name = st.selectbox(
-            "Airline",
-            options=available_names,
-            label_visibility="collapsed"
-        )
-
-    st.write("") # Spacer
-    
-    # Search Button (Full Width)
-    search_clicked = st.button("Search")
-
-# --- 5. RESULTS ---
-st.markdown("---")
-
-if search_clicked:
-    # 1. Validate Dates
-    if not isinstance(date_range, tuple) or len(date_range) != 2:
-        st.error("Please select both a departure and return date.")
-        st.stop()
-    
-    start, end = date_range
-    
-    # 2. Analyze the CHOSEN Airline
-    chosen_code = name_to_code[selected_airline_name]
-    risk_color, messages = get_airline_risk(chosen_code, start, end, db)
-    
-    # Display Main Result
-    st.subheader("Risk Assessment")
-    
-    with st.expander(f"{selected_airline_name} — Status: {risk_color}", expanded=True):
-        if risk_color == "RED":
-            st.error("\n\n".join(messages))
-        elif risk_color == "YELLOW":
-            st.warning("\n\n".join(messages))
-        else:
-            st.success("\n\n".join(messages))
-
-    # 3. IF RISK DETECTED -> Show Alternatives
-    if risk_color in ["RED", "YELLOW"]:
-        st.markdown("### 💡 Recommendation")
-        
-        st.info(f"**Notice:** Our algorithm indicates a probability that **{selected_airline_name}** may encounter labor disputes during your trip. To be safe, consider the alternatives below or purchase travel insurance.")
-        
-        # Find Safe Alternatives for THIS City
-        st.markdown(f"**Smoother options flying to {selected_city}:**")
-        
-        safe_alternatives = []
-        # Check every other airline that flies here
-        available_codes = city_db[selected_city]
-        
-        for code in available_codes:
-            if code == chosen_code: continue # Skip the one we just picked
-            
-            # Check risk for this alternative
-            alt_color, _ = get_airline_risk(code, start, end, db)
-            
-            if alt_color == "GREEN":
-                alt_name = code_to_name.get(code, code)
-                safe_alternatives.append(alt_name)
-        
-        # Display Alternatives
-        if safe_alternatives:
-            for alt in safe_alternatives:
-                st.success(f"✅ **{alt}** is currently marked Safe/Green.")
+# Search bar and results run as a fragment: changing an input or clicking
+# Search reruns only this part, not the CSS and header above.
+@st.fragment
+def search_section():
+    # Computed here so fragment reruns pick up the new day after midnight
+    today = date.today()
+
+    # THE SEARCH BUCKETS (3 Columns)
+    with st.container():
+        c1, c2, c3 = st.columns(3)
+
+        # Bucket 1: Dates
+        with c1:
+            st.markdown("**When are you traveling?**")
+            date_range = st.date_input(
+                "Trip Dates",
+                value=(today, today + timedelta(days=7)),
+                min_value=today,
+                label_visibility="collapsed" 
+            )
+
+        # Bucket 2: City
+        with c2:
+            st.markdown("**To which city?**")
+            selected_city = st.selectbox(
+                "Destination",
+                options=sorted_cities,
+                index=0, 
+                label_visibility="collapsed"
+            )
+
+        # Bucket 3: Airline (Dynamic)
+        with c3:
+            st.markdown("**With which airline?**")
+            # Convert codes (AC) back to names (Air Canada) for the dropdown
+            available_names = get_airline_names(selected_city, db_mtime)
+
+            selected_airline_name = st.selectbox(
+                "Airline",
+                options=available_names,
+                label_visibility="collapsed"
+            )
+
+        st.write("") # Spacer
+
+        # Search Button (Full Width)
+        search_clicked = st.button("Search")
+
+    # --- 5. RESULTS ---
+    st.markdown("---")
+
+    if search_clicked:
+        # 1. Validate Dates
+        if not isinstance(date_range, tuple) or len(date_range) != 2:
+            st.error("Please select both a departure and return date.")
+            st.stop()
+
+        start, end = date_range
+
+        # 2. Analyze the CHOSEN Airline (reuse the last result if nothing changed)
+        chosen_code = name_to_code[selected_airline_name]
+        key = (start, end, selected_city, selected_airline_name, db_mtime)
+
+        if st.session_state.get('_last_key') == key:
+            risk_color, risk_md, safe_alternatives = st.session_state['_last_result']
         else:
+            risks = compute_all_risks(start, end, db_mtime)
+            risk_color, risk_md = render_risk(chosen_code, start, end, db_mtime)
 
-            st.write("No 'Green' alternatives found for this route. Check travel insurance policies.")
-
-
-
-
-
-
-
-
-
-
+            safe_alternatives = []
+            if risk_color in ["RED", "YELLOW"]:
+                # Check every other airline that flies to THIS city
+                for code in city_db[selected_city]:
+                    if code == chosen_code: continue # Skip the one we just picked
 
+                    # Check risk for this alternative
+                    alt_color, _ = risks.get(code, ("GREY", []))
 
+                    if alt_color == "GREEN":
+                        alt_name = code_to_name.get(code, code)
+                        safe_alternatives.append(alt_name)
+                        if len(safe_alternatives) >= MAX_ALTERNATIVES: break # Enough options to show
 
+            st.session_state['_last_key'] = key
+            st.session_state['_last_result'] = (risk_color, risk_md, safe_alternatives)
 
+        # Display Main Result
+        st.subheader("Risk Assessment")
 
+        with st.expander(f"{selected_airline_name} — Status: {risk_color}", expanded=True):
+            if risk_color == "RED":
+                st.error(risk_md)
+            elif risk_color == "YELLOW":
+                st.warning(risk_md)
+            else:
+                st.success(risk_md)
 
+        # 3. IF RISK DETECTED -> Show Alternatives
+        if risk_color in ["RED", "YELLOW"]:
+            st.markdown("### 💡 Recommendation")
 
+            st.info(f"**Notice:** Our algorithm indicates a probability that **{selected_airline_name}** may encounter labor disputes during your trip. To be safe, consider the alternatives below or purchase travel insurance.")
 
+            # Safe Alternatives for THIS City
+            st.markdown(f"**Smoother options flying to {selected_city}:**")
 
+            # Display Alternatives
+            if safe_alternatives:
+                for alt in safe_alternatives:
+                    st.success(f"✅ **{alt}** is currently marked Safe/Green.")
+            else:
 
+                st.write("No 'Green' alternatives found for this route. Check travel insurance policies.")
 
+search_section()
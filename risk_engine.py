@@ -0,0 +1,153 @@
+from datetime import date
+
+# Below this many airlines the plain Python loop beats NumPy's setup cost.
+# Timed on copies of airlines_db.json (about a third of airlines at risk per
+# trip): NumPy is consistently faster from roughly 150-200 airlines up.
+VECTORIZE_MIN_AIRLINES = 200
+
+# Union status vocabulary
+SAFE_STATUSES = frozenset({"Non-Union", "Binding Arbitration"})
+CRITICAL_TOKENS = ("Strike", "Impasse", "Cooling-off")
+NEGOTIATING = "Negotiating"
+
+# Message for an airline with no risk found (shared by both risk passes)
+CONTRACTS_ACTIVE = "✅ Contracts active."
+
+# --- PREPROCESSING ---
+# Bump whenever prepare_db or build_union_arrays change what they store, so
+# the disk-persisted load_data cache is rebuilt instead of reused
+PREPROCESS_VERSION = 2
+
+def prepare_db(db):
+    """
+    Adds pre-parsed fields to every union entry (in place) so the risk
+    checks below only compare dates and flags. Returns the same db.
+    """
+    for airline in db.values():
+        for details in airline['unions'].values():
+            # Parse contract expiry dates once here instead of on every risk check
+            if details['expiration_date'] == "N/A":
+                details['_expiry_date'] = date(2099, 12, 31)
+            else:
+                details['_expiry_date'] = date.fromisoformat(details['expiration_date'])
+
+            # Classify the status once so the risk engine just checks flags
+            status = details['status']
+            details['_is_safe'] = status in SAFE_STATUSES
+            details['_is_critical'] = any(x in status for x in CRITICAL_TOKENS)
+            details['_is_negotiating'] = status == NEGOTIATING
+
+    return db
+
+def build_union_arrays(db):
+    """
+    Flattens every union row of a prepared db into NumPy arrays
+    (one entry per union) for compute_all_risks.
+    """
+    # Imported here so small databases never pay numpy's import cost
+    import numpy as np
+
+    codes = list(db)
+    owner, expiry, is_safe, is_critical, is_negotiating = [], [], [], [], []
+    for i, code in enumerate(codes):
+        for details in db[code]['unions'].values():
+            owner.append(i)
+            expiry.append(details['_expiry_date'])
+            is_safe.append(details['_is_safe'])
+            is_critical.append(details['_is_critical'])
+            is_negotiating.append(details['_is_negotiating'])
+
+    return {
+        'codes': codes,
+        'owner': np.array(owner, dtype=np.int64),
+        'expiry': np.array(expiry, dtype='datetime64[D]'),
+        'is_safe': np.array(is_safe, dtype=bool),
+        'is_critical': np.array(is_critical, dtype=bool),
+        'is_negotiating': np.array(is_negotiating, dtype=bool),
+    }
+
+# --- RISK ENGINE ---
+def get_airline_risk(code, start_date, end_date, db):
+    """
+    Returns: (Color, List of Messages)
+    """
+    airline_data = db.get(code)
+    if airline_data is None:
+        return "GREY", ["No data available"]
+
+    risk_color = "GREEN"
+    reasons = []
+    append = reasons.append
+
+    for group, details in airline_data['unions'].items():
+        status = details['status']
+        expiry_date = details['_expiry_date']
+
+        # Safe
+        if details['_is_safe']:
+            continue 
+
+        group_t = group.title()
+
+        # Critical
+        if details['_is_critical']:
+            risk_color = "RED"
+            append(f"🔴 [CRITICAL] {group_t}: {status}")
+
+        # Warnings
+        elif risk_color != "RED":
+            # Expiry Logic
+            if expiry_date < start_date:
+                risk_color = "YELLOW"
+                append(f"⚠️ [WARNING] {group_t} contract expires BEFORE your trip ({details['expiration_date']}).")
+            elif start_date <= expiry_date <= end_date:
+                risk_color = "YELLOW"
+                append(f"⚠️ [WARNING] {group_t} contract expires DURING your trip.")
+            elif 0 < (expiry_date - end_date).days < 30:
+                risk_color = "YELLOW"
+                append(f"⚠️ [CAUTION] {group_t} contract expires shortly after return.")
+            
+            if details['_is_negotiating'] and risk_color == "GREEN":
+                risk_color = "YELLOW"
+                append(f"⚠️ [WARNING] {group_t} are currently negotiating.")
+
+    if risk_color == "GREEN":
+        append(CONTRACTS_ACTIVE)
+
+    return risk_color, reasons
+
+def compute_all_risks(start_date, end_date, db, arrays=None):
+    """
+    Returns: {code: (Color, List of Messages)}
+    """
+    if arrays is None or len(db) < VECTORIZE_MIN_AIRLINES:
+        return {code: get_airline_risk(code, start_date, end_date, db) for code in db}
+
+    import numpy as np
+
+    # Same rules as get_airline_risk, evaluated for every union at once
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+    expiry = arrays['expiry']
+    active = ~arrays['is_safe']
+    red_rows = active & arrays['is_critical']
+    yellow_rows = active & (
+        (expiry < start)
+        | ((start <= expiry) & (expiry <= end))
+        | ((expiry > end) & (expiry - end < np.timedelta64(30, 'D')))
+        | arrays['is_negotiating']
+    )
+
+    n = len(arrays['codes'])
+    owner = arrays['owner']
+    red = np.bincount(owner[red_rows], minlength=n) > 0
+    yellow = np.bincount(owner[yellow_rows], minlength=n) > 0
+
+    # Messages are still built in Python, but only for airlines at risk
+    risks = {}
+    for code, is_red, is_yellow in zip(arrays['codes'], red.tolist(), yellow.tolist()):
+        if is_red or is_yellow:
+            risks[code] = get_airline_risk(code, start_date, end_date, db)
+        else:
+            risks[code] = ("GREEN", [CONTRACTS_ACTIVE])
+    return risks
@@ -0,0 +1,50 @@
+import json
+import random
+from datetime import date, timedelta
+
+import risk_engine
+
+STATUSES = ["Active", "Negotiating", "Strike Vote", "Impasse", "Non-Union",
+            "Binding Arbitration", "Cooling-off Period", "Mediation"]
+GROUPS = ["pilots", "flight_attendants", "mechanics", "agents"]
+
+
+def random_db(n, seed=0):
+    rng = random.Random(seed)
+    db = {}
+    for i in range(n):
+        unions = {}
+        for group in rng.sample(GROUPS, rng.randint(0, len(GROUPS))):
+            if rng.random() < 0.1:
+                expiry = "N/A"
+            else:
+                expiry = (date(2025, 1, 1) + timedelta(days=rng.randint(0, 1500))).isoformat()
+            unions[group] = {"status": rng.choice(STATUSES), "expiration_date": expiry}
+        db[f"X{i}"] = {"name": f"Airline {i}", "unions": unions}
+    return db
+
+
+def date_ranges(seed=0):
+    rng = random.Random(seed)
+    for k in range(50):
+        start = date(2025, 1, 1) + timedelta(days=k * 29)
+        yield start, start + timedelta(days=rng.randint(0, 40))
+
+
+def assert_paths_agree(db, monkeypatch):
+    risk_engine.prepare_db(db)
+    arrays = risk_engine.build_union_arrays(db)
+    # Force the vectorized pass regardless of db size
+    monkeypatch.setattr(risk_engine, "VECTORIZE_MIN_AIRLINES", 0)
+    for start, end in date_ranges():
+        scalar = {code: risk_engine.get_airline_risk(code, start, end, db) for code in db}
+        assert risk_engine.compute_all_risks(start, end, db, arrays) == scalar, (start, end)
+
+
+def test_vectorized_matches_scalar_on_random_db(monkeypatch):
+    assert_paths_agree(random_db(300), monkeypatch)
+
+
+def test_vectorized_matches_scalar_on_shipped_db(monkeypatch):
+    with open("airlines_db.json") as f:
+        assert_paths_agree(json.load(f), monkeypatch)